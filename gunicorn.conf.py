@@ -0,0 +1,9 @@
+# Gunicorn configuration (loaded automatically by `gunicorn app:app`)
+# gevent workers monkey-patch sockets, so each in-flight Tradier call yields
+# and one slow upstream response no longer blocks other screener requests
+
+import os
+
+worker_class = "gevent"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", "200"))
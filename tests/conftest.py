@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+# Point the shared cache somewhere private before tradier_client opens it
+
+os.environ.setdefault("TRADIER_CACHE_DIR", tempfile.mkdtemp(prefix="tradier-test-"))
+
+import diskcache
+import httpx
+import pytest
+
+import tradier_client
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """
+    Fresh on-disk cache per test for both the response cache and the
+    rate limiter
+    """
+    test_cache = diskcache.Cache(str(tmp_path / "cache"))
+    monkeypatch.setattr(tradier_client, "CACHE", test_cache)
+    monkeypatch.setattr(tradier_client.RATE_LIMITER, "_cache", test_cache)
+    yield test_cache
+    test_cache.close()
+
+
+@pytest.fixture
+def tradier(monkeypatch):
+    """
+    Route tradier_client.CLIENT through an httpx.MockTransport
+    Usage: requests = tradier(handler), where handler(request) returns an
+    httpx.Response; requests collects every request sent
+    """
+    def install(handler):
+        requests = []
+
+        def record(request):
+            requests.append(request)
+            return handler(request)
+
+        client = httpx.Client(transport=httpx.MockTransport(record))
+        monkeypatch.setattr(tradier_client, "CLIENT", client)
+        return requests
+
+    return install
@@ -0,0 +1,250 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import tradier_client
+from tradier_client import TokenBucket
+
+
+class FakeClock:
+    """
+    Stand-in for the time module: sleep() advances time() instantly
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(tradier_client, "time", fake)
+    return fake
+
+
+# TokenBucket
+
+
+def test_bucket_allows_burst_up_to_capacity(cache, clock):
+    bucket = TokenBucket(cache, "bucket", rate=2, capacity=3)
+    for _ in range(3):
+        bucket.take()
+    assert clock.sleeps == []
+
+
+def test_bucket_waits_for_refill_when_empty(cache, clock):
+    bucket = TokenBucket(cache, "bucket", rate=2, capacity=2)
+    bucket.take()
+    bucket.take()
+    bucket.take()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_bucket_refills_with_elapsed_time(cache, clock):
+    bucket = TokenBucket(cache, "bucket", rate=2, capacity=2)
+    bucket.take()
+    bucket.take()
+    clock.now += 1.0
+    bucket.take()
+    bucket.take()
+    assert clock.sleeps == []
+
+
+def test_bucket_refill_is_capped_at_capacity(cache, clock):
+    bucket = TokenBucket(cache, "bucket", rate=2, capacity=2)
+    bucket.take()
+    clock.now += 60.0
+    for _ in range(3):
+        bucket.take()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_buckets_sharing_a_cache_share_tokens(cache, clock):
+    # Each worker process builds its own TokenBucket over the same cache
+    first = TokenBucket(cache, "bucket", rate=1, capacity=1)
+    second = TokenBucket(cache, "bucket", rate=1, capacity=1)
+    first.take()
+    second.take()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+# Monthly expirations
+
+
+def test_third_fridays_empty_window():
+    # 2026-10-16 and 2026-11-20 are the 3rd Fridays around this window
+    assert tradier_client._third_fridays("2026-10-17", "2026-11-19") == []
+
+
+def test_third_fridays_single_match():
+    assert tradier_client._third_fridays("2026-10-10", "2026-11-09") == [
+        "2026-10-16"
+    ]
+
+
+def test_third_fridays_bounds_are_inclusive_across_year_end():
+    assert tradier_client._third_fridays("2026-12-18", "2027-01-15") == [
+        "2026-12-18",
+        "2027-01-15",
+    ]
+
+
+def _chain_response(strikes):
+    options = [
+        {"option_type": "put", "strike": s, "greeks": {"mid_iv": 0.3}}
+        for s in strikes
+    ]
+    return httpx.Response(200, json={"options": {"option": options}})
+
+
+def test_rejected_predicted_date_falls_back_to_expirations(tradier):
+    def handler(request):
+        if request.url.path.endswith("/expirations"):
+            return httpx.Response(200, json={"expirations": {"date": ["2026-10-23"]}})
+        if request.url.params["expiration"] == "2026-10-16":
+            return httpx.Response(404)
+        return _chain_response([17.0])
+
+    requests = tradier(handler)
+    iv = tradier_client.get_near_money_put_iv(
+        "KO", 25.0, "2026-10-10", "2026-11-09", "monthly"
+    )
+    assert iv == 30.0
+    assert [r.url.params.get("expiration") for r in requests] == [
+        "2026-10-16",
+        None,
+        "2026-10-23",
+    ]
+
+
+@pytest.mark.parametrize("status", [401, 403, 429])
+def test_predicted_date_auth_and_rate_limit_errors_are_not_retried(
+    tradier, monkeypatch, status
+):
+    monkeypatch.setattr(tradier_client, "MAX_RATE_LIMIT_RETRIES", 0)
+    requests = tradier(lambda request: httpx.Response(status))
+    iv = tradier_client.get_near_money_put_iv(
+        "KO", 25.0, "2026-10-10", "2026-11-09", "monthly"
+    )
+    assert iv is None
+    assert len(requests) == 1
+
+
+# Batched quotes
+
+
+def _quote(symbol, last=10.0):
+    return {"symbol": symbol, "last": last, "volume": 1000, "description": symbol}
+
+
+def test_batch_single_quote_dict(tradier):
+    body = {"quotes": {"quote": _quote("KO")}}
+    tradier(lambda request: httpx.Response(200, json=body))
+    quotes = tradier_client.get_stock_quotes_batch(["ko"])
+    assert list(quotes) == ["KO"]
+    assert quotes["KO"]["price"] == 10.0
+
+
+def test_batch_quote_list(tradier):
+    body = {"quotes": {"quote": [_quote("KO"), _quote("F", 12.5)]}}
+    requests = tradier(lambda request: httpx.Response(200, json=body))
+    quotes = tradier_client.get_stock_quotes_batch(["KO", "F"])
+    assert quotes["F"]["price"] == 12.5
+    assert set(quotes) == {"KO", "F"}
+    assert len(requests) == 1
+
+
+def test_batch_unmatched_symbols_are_not_refetched(tradier):
+    body = {"quotes": {"unmatched_symbols": {"symbol": "ZZZZ"}}}
+    requests = tradier(lambda request: httpx.Response(200, json=body))
+    assert tradier_client.get_stock_quotes_batch(["ZZZZ"]) == {}
+    assert len(requests) == 1
+
+
+def test_batch_skips_malformed_quotes(tradier):
+    body = {"quotes": {"quote": [{"last": 1.0}, _quote("KO")]}}
+    tradier(lambda request: httpx.Response(200, json=body))
+    assert list(tradier_client.get_stock_quotes_batch(["KO", "F"])) == ["KO"]
+
+
+def test_batch_is_served_from_cache(tradier):
+    body = {"quotes": {"quote": _quote("KO")}}
+    requests = tradier(lambda request: httpx.Response(200, json=body))
+    tradier_client.get_stock_quotes_batch(["KO"])
+    assert tradier_client.get_stock_quotes_batch(["KO"])["KO"]["price"] == 10.0
+    assert len(requests) == 1
+
+
+@pytest.mark.parametrize("status", [400, 401, 429])
+def test_batch_rejected_chunk_is_not_retried_per_symbol(
+    tradier, monkeypatch, status
+):
+    monkeypatch.setattr(tradier_client, "MAX_RATE_LIMIT_RETRIES", 0)
+    requests = tradier(lambda request: httpx.Response(status))
+    assert tradier_client.get_stock_quotes_batch(["KO", "F"]) == {}
+    assert len(requests) == 1
+
+
+def test_batch_server_error_falls_back_per_symbol(tradier):
+    def handler(request):
+        symbols = request.url.params["symbols"]
+        if "," in symbols:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"quotes": {"quote": _quote(symbols)}})
+
+    requests = tradier(handler)
+    assert set(tradier_client.get_stock_quotes_batch(["KO", "F"])) == {"KO", "F"}
+    assert [r.url.params["symbols"] for r in requests] == ["KO,F", "KO", "F"]
+
+
+def test_batch_transport_error_falls_back_per_symbol(tradier):
+    def handler(request):
+        symbols = request.url.params["symbols"]
+        if "," in symbols:
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, json={"quotes": {"quote": _quote(symbols)}})
+
+    tradier(handler)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        quotes = tradier_client.get_stock_quotes_batch(["KO", "F"], executor=executor)
+    assert set(quotes) == {"KO", "F"}
+
+
+# Put ranking
+
+
+@pytest.mark.parametrize(
+    "strikes, mid_ivs, expected",
+    [
+        # At price 25 the target strike is 17.5; 19.0 and 16.0 tie for the
+        # third slot, so the one earlier in the chain is used
+        ([17.5, 17.0, 19.0, 16.0], [0.2, 0.2, 0.5, 0.8], 30.0),
+        ([17.5, 17.0, 16.0, 19.0], [0.2, 0.2, 0.8, 0.5], 40.0),
+    ],
+)
+def test_ranking_ties_keep_chain_order(monkeypatch, strikes, mid_ivs, expected):
+    monkeypatch.setattr(
+        tradier_client, "_fetch_chain", lambda *args: (strikes, mid_ivs)
+    )
+    iv = tradier_client.get_near_money_put_iv(
+        "KO", 25.0, "2026-10-10", "2026-11-09", "monthly"
+    )
+    assert iv == expected
+
+
+def test_ranking_skips_missing_and_out_of_range_iv(monkeypatch):
+    chain = ([17.5, 17.0, 18.0], [None, 3.5, 0.25])
+    monkeypatch.setattr(tradier_client, "_fetch_chain", lambda *args: chain)
+    iv = tradier_client.get_near_money_put_iv(
+        "KO", 25.0, "2026-10-10", "2026-11-09", "monthly"
+    )
+    assert iv == 25.0
@@ -0,0 +1,623 @@
+"""
+Tradier market data client shared by the screener endpoints
+
+Holds the process-wide HTTP client and the rate limiter and TTL caches,
+which are shared across worker processes through an on-disk store.
+"""
+
+from datetime import date, datetime, timedelta
+import logging
+import os
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import diskcache
+import httpx
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Tradier API Configuration
+# REQUIRED: Set TRADIER_API_KEY as environment variable
+
+TRADIER_API_KEY = os.environ.get("TRADIER_API_KEY", "5jkKUYdz0NqUDnSvZNrEstr3ATNd")
+
+# Optional: Defaults to sandbox, set to production URL when ready
+
+TRADIER_BASE_URL = os.environ.get("TRADIER_BASE_URL", "https://api.tradier.com/v1")
+
+# Optional: Requests per minute allowed by your Tradier account
+
+TRADIER_RATE_LIMIT = int(os.environ.get("TRADIER_RATE_LIMIT", "120"))
+
+# Optional: Directory for the response cache shared by all worker processes
+
+TRADIER_CACHE_DIR = os.environ.get("TRADIER_CACHE_DIR", "/tmp/tradier-cache")
+
+# Validate API key is set
+
+if not TRADIER_API_KEY:
+    raise ValueError(
+        "TRADIER_API_KEY environment variable is required. "
+        "Set it in Render dashboard or locally with: "
+        "export TRADIER_API_KEY='your_key_here' (Mac/Linux) or "
+        "$env:TRADIER_API_KEY='your_key_here' (Windows PowerShell)"
+    )
+HEADERS = {"Authorization": f"Bearer {TRADIER_API_KEY}", "Accept": "application/json"}
+
+# Shared HTTP/2 client: concurrent calls to Tradier are multiplexed over a
+# few pooled keep-alive connections instead of one socket per request
+
+CLIENT = httpx.Client(
+    http2=True,
+    headers=HEADERS,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    timeout=30.0,
+)
+
+# On-disk store shared by every worker process: holds the response cache
+# (see below) and the rate limiter state
+
+CACHE = diskcache.Cache(TRADIER_CACHE_DIR)
+
+MAX_RATE_LIMIT_RETRIES = 3  # Retries after a 429 before giving up
+
+
+class TokenBucket:
+    """
+    Token bucket throttle whose state lives in a diskcache.Cache, so every
+    thread and worker process sharing the cache draws from one bucket
+
+    Args:
+        cache: Shared diskcache.Cache holding the bucket state
+        key: Cache key for the bucket state
+        rate: Tokens added per second
+        capacity: Maximum burst size
+    """
+
+    def __init__(self, cache, key, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._cache = cache
+        self._key = key
+
+    def take(self):
+        """
+        Block until a token is available, then consume it
+        """
+        while True:
+            # transact() serializes the read-modify-write across processes
+            with self._cache.transact():
+                now = time.time()
+                tokens, updated = self._cache.get(self._key, (self.capacity, now))
+                tokens = min(
+                    self.capacity, tokens + max(0.0, now - updated) * self.rate
+                )
+                if tokens >= 1:
+                    self._cache.set(self._key, (tokens - 1, now))
+                    return
+                self._cache.set(self._key, (tokens, now))
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+RATE_LIMITER = TokenBucket(
+    CACHE, "ratelimit", rate=TRADIER_RATE_LIMIT / 60, capacity=TRADIER_RATE_LIMIT
+)
+
+
+def _tradier_get(url, params):
+    """
+    GET a Tradier endpoint through the shared client and rate limiter,
+    backing off exponentially (or per Retry-After) on HTTP 429
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        RATE_LIMITER.take()
+        response = CLIENT.get(url, params=params)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        backoff = 2**attempt
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            backoff = max(backoff, int(retry_after))
+        logger.warning("Rate limited by Tradier, retrying in %ss", backoff)
+        time.sleep(backoff)
+
+
+QUOTE_BATCH_SIZE = 100  # Max symbols per /markets/quotes request
+
+# TTL response cache in the shared CACHE, so the first request for a
+# symbol warms it for all worker processes
+# Keys: "q:{symbol}", "exp:{symbol}", "chain:{symbol}:{expiration}"
+# Expirations rarely change intra-day; quotes only need to survive a burst;
+# chains move during market hours but are static once the market closes
+
+QUOTE_TTL = 5
+EXPIRATIONS_TTL = 86400
+CHAIN_TTL_MARKET_HOURS = 15
+CHAIN_TTL_AFTER_HOURS = 600
+
+MARKET_TZ = "America/New_York"
+
+
+def cache_get(key):
+    """
+    Get a cached value
+    Returns: the value, or None if missing or expired
+    """
+    return CACHE.get(key)
+
+
+def cache_set(key, value, ttl):
+    """
+    Cache a value for ttl seconds
+    """
+    CACHE.set(key, value, expire=ttl)
+
+
+def _as_list(value):
+    """
+    Tradier returns a bare value instead of a one-element list when there
+    is a single result; normalize to a list
+    """
+    return value if isinstance(value, list) else [value]
+
+
+def _parse_quote(quote, ticker_symbol):
+    """
+    Normalize a raw Tradier quote object
+    Returns: price, volume, description, symbol
+    """
+    return {
+        "price": float(quote.get("last") or 0),
+        "volume": float(quote.get("volume") or 0),
+        "description": quote.get("description", ""),
+        "symbol": quote.get("symbol", ticker_symbol),
+    }
+
+
+def get_stock_quote(ticker_symbol):
+    """
+    Get stock quote data from Tradier
+    Returns: price, volume, description
+    """
+    cached = cache_get(f"q:{ticker_symbol.upper()}")
+    if cached is not None:
+        return cached
+    try:
+        url = f"{TRADIER_BASE_URL}/markets/quotes"
+        params = {"symbols": ticker_symbol}
+
+        response = _tradier_get(url, params)
+        response.raise_for_status()
+
+        data = orjson.loads(response.content)
+
+        # Handle single quote response (missing when the symbol is unknown)
+
+        try:
+            quote = _parse_quote(data["quotes"]["quote"], ticker_symbol)
+        except (KeyError, TypeError):
+            return None
+        cache_set(f"q:{ticker_symbol.upper()}", quote, QUOTE_TTL)
+        return quote
+    except Exception as e:
+        logger.warning("Error fetching quote for %s: %s", ticker_symbol, e)
+        return None
+
+
+def get_stock_quotes_batch(ticker_symbols, executor=None):
+    """
+    Get stock quotes for many tickers with one Tradier call per
+    QUOTE_BATCH_SIZE symbols. Symbols Tradier reports as unmatched are left
+    out. Chunks that hit a transport error or 5xx are retried one symbol at
+    a time; chunks rejected with a 4xx (including a final 429) are dropped
+
+    Args:
+        ticker_symbols: Stock tickers
+        executor: Optional executor to run the per-symbol retries on
+
+    Returns: dict mapping upper-case symbol to quote data
+    """
+    symbols = list(dict.fromkeys(t.upper() for t in ticker_symbols if t))
+    quotes = {}
+
+    # Serve what we can from cache and only request the misses
+
+    misses = []
+    for symbol in symbols:
+        cached = cache_get(f"q:{symbol}")
+        if cached is not None:
+            quotes[symbol] = cached
+        else:
+            misses.append(symbol)
+    symbols = misses
+
+    for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+        chunk = symbols[i : i + QUOTE_BATCH_SIZE]
+        try:
+            url = f"{TRADIER_BASE_URL}/markets/quotes"
+            params = {"symbols": ",".join(chunk)}
+
+            response = _tradier_get(url, params)
+            response.raise_for_status()
+
+            data = orjson.loads(response.content)
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            logger.warning("Error fetching quotes for %s: %s", ",".join(chunk), e)
+
+            # Retrying a rate-limited or rejected chunk per symbol would only
+            # multiply the calls Tradier is refusing
+
+            if (
+                isinstance(e, httpx.HTTPStatusError)
+                and e.response.status_code < 500
+            ):
+                continue
+            pool_map = executor.map if executor is not None else map
+            for symbol, quote in zip(chunk, pool_map(get_stock_quote, chunk)):
+                if quote:
+                    quotes[symbol] = quote
+            continue
+        except Exception as e:
+            logger.warning("Error fetching quotes for %s: %s", ",".join(chunk), e)
+            continue
+
+        # Single symbol returns a dict, multiple return a list; the "quote"
+        # key is missing entirely when every symbol was unmatched
+
+        try:
+            raw_quotes = _as_list(data["quotes"]["quote"])
+        except (KeyError, TypeError):
+            continue
+        for quote in raw_quotes:
+            # One malformed entry should not fail the rest of the batch
+            try:
+                symbol = quote["symbol"].upper()
+                parsed = _parse_quote(quote, symbol)
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                logger.warning("Skipping malformed quote %r: %s", quote, e)
+                continue
+            quotes[symbol] = parsed
+            cache_set(f"q:{symbol}", parsed, QUOTE_TTL)
+    return quotes
+
+
+def get_options_expirations(ticker_symbol):
+    """
+    Get available options expiration dates
+    Returns: list of expiration date strings
+    """
+    cached = cache_get(f"exp:{ticker_symbol.upper()}")
+    if cached is not None:
+        return cached
+    try:
+        url = f"{TRADIER_BASE_URL}/markets/options/expirations"
+        params = {"symbol": ticker_symbol}
+
+        response = _tradier_get(url, params)
+        response.raise_for_status()
+
+        data = orjson.loads(response.content)
+
+        # Ensure it's a list (single date returns string); tickers without
+        # options come back as {"expirations": null}
+
+        try:
+            expirations = _as_list(data["expirations"]["date"])
+        except (KeyError, TypeError):
+            return []
+        cache_set(f"exp:{ticker_symbol.upper()}", expirations, EXPIRATIONS_TTL)
+        return expirations
+    except Exception as e:
+        logger.warning("Error fetching expirations for %s: %s", ticker_symbol, e)
+        return []
+
+
+def expiration_window(mode, today=None):
+    """
+    Expiration date window for a screening mode
+
+    Args:
+        mode: 'weekly' (7-14 days) or 'monthly' (30-45 days)
+        today: Date to count from (defaults to today)
+
+    Returns: (target_ymd, end_ymd) "YYYY-MM-DD" strings, inclusive
+    """
+    today = today or date.today()
+    if mode == "weekly":
+        start_days, end_days = 7, 14
+    else:  # monthly (default)
+        start_days, end_days = 30, 45
+    return (
+        (today + timedelta(days=start_days)).isoformat(),
+        (today + timedelta(days=end_days)).isoformat(),
+    )
+
+
+def _third_fridays(start_ymd, end_ymd):
+    """
+    Standard monthly expiration dates (3rd Friday) between two
+    "YYYY-MM-DD" dates, inclusive
+    Returns: list of "YYYY-MM-DD" strings
+    """
+    fridays = []
+    start_date = date.fromisoformat(start_ymd)
+    end_date = date.fromisoformat(end_ymd)
+    year, month = start_date.year, start_date.month
+    while date(year, month, 1) <= end_date:
+        first = date(year, month, 1)
+        # weekday() 4 is Friday; 3rd Friday falls on day 15-21
+
+        third_friday = (
+            first + timedelta(days=(4 - first.weekday()) % 7 + 14)
+        ).isoformat()
+        if start_ymd <= third_friday <= end_ymd:
+            fridays.append(third_friday)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return fridays
+
+
+def _chain_ttl():
+    """
+    Chain cache TTL for the current time: short during regular US market
+    hours (9:30-16:00 ET, Mon-Fri), long otherwise
+    """
+    # Resolved per call (ZoneInfo caches it) so a host without a tz database
+    # still serves chains, cached with the after-hours TTL
+    try:
+        now = datetime.now(ZoneInfo(MARKET_TZ))
+    except ZoneInfoNotFoundError:
+        return CHAIN_TTL_AFTER_HOURS
+    if now.weekday() < 5 and (9, 30) <= (now.hour, now.minute) < (16, 0):
+        return CHAIN_TTL_MARKET_HOURS
+    return CHAIN_TTL_AFTER_HOURS
+
+
+def _fetch_chain(ticker_symbol, expiration, refresh=False):
+    """
+    Get the puts from the options chain (with Greeks) for one expiration
+
+    Args:
+        ticker_symbol: Stock ticker
+        expiration: Expiration date ("YYYY-MM-DD")
+        refresh: Bypass the cached chain and refetch it
+
+    Returns: (strikes, mid_ivs) parallel lists for the puts, or None if
+    Tradier has no chain for it
+    """
+    cache_key = f"chain:{ticker_symbol.upper()}:{expiration}"
+    cached = cache_get(cache_key)
+    if cached is not None and not refresh:
+        return cached
+
+    url = f"{TRADIER_BASE_URL}/markets/options/chains"
+    params = {
+        "symbol": ticker_symbol,
+        "expiration": expiration,
+        "greeks": "true",  # CRITICAL: Request Greeks/IV data
+    }
+
+    response = _tradier_get(url, params)
+    response.raise_for_status()
+
+    data = orjson.loads(response.content)
+
+    # Unknown expirations come back as {"options": null}; on a refresh,
+    # keep serving the cached chain instead
+
+    try:
+        options = _as_list(data["options"]["option"])
+    except (KeyError, TypeError):
+        return cached
+
+    # Tradier has no field selection on chains, so drop calls and every
+    # greek except mid_iv right away. One pass fills parallel lists, which
+    # the strike ranking hands straight to NumPy
+
+    strikes, mid_ivs = [], []
+    for opt in options:
+        if opt["option_type"] == "put":
+            strikes.append(opt["strike"] or 0.0)
+            mid_ivs.append((opt.get("greeks") or {}).get("mid_iv"))
+    chain = (strikes, mid_ivs)
+
+    # Don't let a degraded refetch replace a richer chain that is still cached
+
+    if cached is not None and len(strikes) < len(cached[0]):
+        return cached
+    cache_set(cache_key, chain, _chain_ttl())
+    return chain
+
+
+def get_near_money_put_iv(
+    ticker_symbol, current_price, target_ymd, end_ymd, mode="monthly", refresh=False
+):
+    """
+    Get implied volatility from near-the-money put options
+
+    Args:
+        ticker_symbol: Stock ticker
+        current_price: Current stock price
+        target_ymd, end_ymd: Expiration window from expiration_window()
+        mode: 'weekly' (7-14 days) or 'monthly' (30-45 days)
+        refresh: Bypass cached options chains
+
+    Targets puts around 60-80% of current price (roughly 20-40 delta)
+
+    Expiration choice: weekly mode uses the earliest listed expiration in
+    the window. Monthly mode uses the standard monthly (3rd Friday)
+    contract in the window, even when an earlier weekly is listed, and
+    falls back to the earliest listed expiration when no 3rd-Friday chain
+    exists (e.g. holiday-shifted expirations)
+    """
+    try:
+        # Tradier dates are ISO "YYYY-MM-DD", so plain string comparison
+        # against the window orders them the same as dates without parsing
+
+        chain = None
+
+        # Monthly mode targets the standard monthly contract, which follows
+        # the 3rd Friday rule, so try the predicted date directly and skip
+        # the expirations lookup on a hit
+
+        if mode != "weekly":
+            for expiration in _third_fridays(target_ymd, end_ymd):
+                try:
+                    chain = _fetch_chain(ticker_symbol, expiration, refresh)
+                except httpx.HTTPStatusError as e:
+                    # Only a rejected guess (400/404) means use the lookup;
+                    # auth, rate-limit and server errors go to the caller
+                    if e.response.status_code not in (400, 404):
+                        raise
+                    logger.debug(
+                        "No chain for %s on predicted %s: %s",
+                        ticker_symbol,
+                        expiration,
+                        e,
+                    )
+                    continue
+                if chain is not None:
+                    break
+        if chain is None:
+            # Get available expiration dates
+
+            expirations = get_options_expirations(ticker_symbol)
+
+            if not expirations:
+                logger.info("No options expirations found for %s", ticker_symbol)
+                return None
+            suitable_expirations = [
+                exp_str for exp_str in expirations if target_ymd <= exp_str <= end_ymd
+            ]
+            # If no options in 7-14 day range, use nearest expiration
+
+            if not suitable_expirations:
+                suitable_expirations = [expirations[0]]
+            # Get options chain for the nearest suitable expiration
+
+            chain = _fetch_chain(ticker_symbol, suitable_expirations[0], refresh)
+
+        if chain is None:
+            logger.info("No options chain data for %s", ticker_symbol)
+            return None
+        strikes, mid_ivs = chain
+        if not strikes:
+            logger.info("No put options found for %s", ticker_symbol)
+            return None
+        
+        # Find puts near 60-80% of current price (roughly 20-40 delta range)
+        # This gives us better liquidity and more reasonable IV
+
+        target_strike_low = current_price * 0.60
+        target_strike_high = current_price * 0.80
+        target_strike = current_price * 0.70  # Midpoint
+
+        # Calculate distance to target strike for each put
+        # Prioritize puts in the 60-80% range
+
+        strike_prices = np.asarray(strikes, dtype=np.float64)
+        distances = np.abs(strike_prices - target_strike)
+
+        # Penalize strikes outside our preferred range
+
+        distances[
+            (strike_prices < target_strike_low) | (strike_prices > target_strike_high)
+        ] += 1000
+
+        # Take the 3 nearest, ordered by distance; a stable sort keeps the
+        # earlier strike in the chain when distances tie
+
+        nearest_idx = np.argsort(distances, kind="stable")[:3]
+
+        # Get average IV from nearest puts
+        iv_values = []
+        for i in nearest_idx:
+            # Tradier sends mid_iv as null for strikes without a quote
+
+            if mid_ivs[i] is not None:
+                mid_iv = float(mid_ivs[i])
+                # mid_iv is already in decimal form (e.g., 0.5234 = 52.34%)
+                # Only include reasonable IV values (5% to 200%)
+                if 0.05 <= mid_iv <= 2.0:
+                    iv_values.append(mid_iv)
+        
+        if iv_values:
+            avg_iv = sum(iv_values) / len(iv_values)
+            return round(avg_iv * 100, 2)  # Convert to percentage for display
+        
+        logger.info("No IV data found in options chain for %s", ticker_symbol)
+        return None
+        
+    except Exception as e:
+        logger.warning("Error getting IV for %s: %s", ticker_symbol, e)
+        return None
+
+
+def get_ticker_data(
+    ticker_symbol,
+    mode="monthly",
+    quote=None,
+    refresh=False,
+    window=None,
+    fetch_quote=True,
+):
+    """
+    Get comprehensive ticker data for wheel strategy screening
+
+    Args:
+        ticker_symbol: Stock ticker
+        mode: 'weekly' (7-14 days) or 'monthly' (30-45 days)
+        quote: Preloaded quote from get_stock_quotes_batch
+        refresh: Bypass cached options chains
+        window: Precomputed expiration_window(mode) shared across tickers
+        fetch_quote: Fetch the quote when none is given; pass False when the
+            batch already answered for this symbol
+    """
+    logger.debug("Fetching data for %s (%s mode)", ticker_symbol, mode)
+
+    try:
+        # Get stock quote unless it was preloaded in a batch
+
+        if quote is None and fetch_quote:
+            quote = get_stock_quote(ticker_symbol)
+
+        if not quote:
+            return {
+                "ticker": ticker_symbol.upper(),
+                "error": "Unable to fetch quote data",
+            }
+        current_price = quote["price"]
+        volume_raw = quote["volume"]
+
+        # Get implied volatility with mode
+
+        logger.debug("Getting IV for %s", ticker_symbol)
+        target_ymd, end_ymd = window or expiration_window(mode)
+        iv = get_near_money_put_iv(
+            ticker_symbol, current_price, target_ymd, end_ymd, mode, refresh
+        )
+
+        # Convert volume to millions
+
+        volume = round(volume_raw / 1e6, 2)
+
+        logger.debug(
+            "%s: Price=$%.2f, IV=%s%%, Vol=%sM",
+            ticker_symbol,
+            current_price,
+            iv,
+            volume,
+        )
+
+        return {
+            "ticker": ticker_symbol.upper(),
+            "price": round(current_price, 2),
+            "implied_volatility": iv if iv is not None else "N/A",
+            "description": quote["description"],
+            "volume": volume,
+        }
+    except Exception as e:
+        logger.warning("Error processing %s: %s", ticker_symbol, e)
+        return {"ticker": ticker_symbol.upper(), "error": str(e)}